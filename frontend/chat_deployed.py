@@ -1,7 +1,11 @@
 import os
-import json
+import sys
+import time
 import uuid
+import asyncio
 import httpx
+import orjson
+import plotly.io as pio
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -10,108 +14,156 @@ LANGGRAPH_SERVER_URL = os.getenv("LANGGRAPH_SERVER_URL")
 # LANGGRAPH_SERVER_URL = https://langgraph-intro-35xv.onrender.com
 
 
-async def create_thread(user_id: str) -> dict:
-    """Create a new thread for the given user."""
+# Shared client so every request reuses pooled keep-alive connections instead
+# of paying a fresh TCP + TLS handshake per call to the LangGraph server.
+_client: httpx.AsyncClient | None = None
+
+# Bodies are serialized with orjson instead of httpx's stdlib json path,
+# so the content type has to be set explicitly
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Cap in-flight requests per process and retry transient failures
+_semaphore = asyncio.Semaphore(10)
+MAX_RETRIES = 4
+
+
+async def request_with_retry(method: str, url: str, **kwargs) -> httpx.Response:
+    """Issue a request, retrying 5xx responses and transient transport errors
+    with exponential backoff. Concurrency is capped by a shared semaphore."""
+    client = await get_client()
+    async with _semaphore:
+        for attempt in range(MAX_RETRIES):
+            try:
+                response = await client.request(method, url, **kwargs)
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return response
+            except (httpx.ConnectError, httpx.ReadTimeout):
+                if attempt == MAX_RETRIES - 1:
+                    raise
+            # No point backing off after the final attempt
+            if attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(0.25 * 2 ** attempt)
+
+        # Retries exhausted on 5xx responses
+        response.raise_for_status()
+        return response
+
+
+async def get_client() -> httpx.AsyncClient:
+    """Get the shared httpx client, creating it on first use."""
+    global _client
+    if _client is None:
+        # get_stream holds one connection for the whole run, so keepalive
+        # headroom must exceed the number of concurrent chat sessions.
+        limits = httpx.Limits(
+            max_connections=1000,
+            max_keepalive_connections=100,
+            keepalive_expiry=30.0
+        )
+        _client = httpx.AsyncClient(
+            base_url=LANGGRAPH_SERVER_URL,
+            timeout=httpx.Timeout(120.0, connect=10.0), # Generous timeout to wait for Render spin up
+            limits=limits,
+            # HTTP/2 lets state calls multiplex over the same connection as
+            # an in-flight SSE stream; retries cover transient connect
+            # failures (e.g. Render cold starts)
+            transport=httpx.AsyncHTTPTransport(retries=2, http2=True, limits=limits)
+        )
+    return _client
+
+
+async def close_client():
+    """Close the shared httpx client if it was created."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def json_request(method: str, url: str, body: dict = None) -> dict:
+    """Issue a JSON request and return the decoded response body.
+
+    All the thread helpers funnel through here, so serialization, retries,
+    and error logging live in one place.
+    """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url=f"{LANGGRAPH_SERVER_URL}/threads",
-                json={
-                    "thread_id": str(uuid.uuid4()),
-                    "metadata": {
-                        "user_id": user_id
-                    },
-                    "if_exists": "do_nothing"
-                },
-                timeout=120.0 # Added timeout to wait for Render spin up
-            )
-            response.raise_for_status()
+        kwargs = {}
+        if body is not None:
+            kwargs["content"] = orjson.dumps(body)
+            kwargs["headers"] = JSON_HEADERS
+
+        response = await request_with_retry(method, url, **kwargs)
 
-            return response.json()
+        return response.json()
     except Exception as e:
         print(f"Request failed: {e}")
         raise
 
 
+async def create_thread(user_id: str) -> dict:
+    """Create a new thread for the given user."""
+    return await json_request(
+        "POST", "/threads",
+        body={
+            "thread_id": str(uuid.uuid4()),
+            "metadata": {
+                "user_id": user_id
+            },
+            "if_exists": "do_nothing"
+        }
+    )
+
+
 async def get_thread_state(thread_id: str) -> dict:
     """Get the state of the thread."""
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url=f"{LANGGRAPH_SERVER_URL}/threads/{thread_id}/state"
-            )
-            response.raise_for_status()
-
-            return response.json()
-    except Exception as e:
-        print(f"Request failed: {e}")
-        raise
+    return await json_request("GET", f"/threads/{thread_id}/state")
 
 
 async def get_thread_messages(thread_id: str) -> dict:
     """Get the message history of the thread."""
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url=f"{LANGGRAPH_SERVER_URL}/threads/{thread_id}/messages"
-            )
-            response.raise_for_status()
-
-            return response.json()
-    except Exception as e:
-        print(f"Request failed: {e}")
-        raise
+    return await json_request("GET", f"/threads/{thread_id}/messages")
 
 
 async def save_thread_state(thread_id: str, state_data: dict) -> dict:
     """Save the current state of the thread."""
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url=f"{LANGGRAPH_SERVER_URL}/threads/{thread_id}/save",
-                json=state_data
-            )
-            response.raise_for_status()
-
-            return response.json()
-    except Exception as e:
-        print(f"Request failed: {e}")
-        raise
+    return await json_request("POST", f"/threads/{thread_id}/save", body=state_data)
 
 
-def process_line(line: str, current_event: str) -> str:
+def process_line(line: bytes, current_event: str) -> str:
     """Process a single data line from the streaming response."""
     try:
         # Process data lines
-        if line.startswith("data: "):
+        if line.startswith(b"data: "):
             data_content = line[6:]
 
             if current_event == "messages":
-                message_chunk, metadata = json.loads(data_content)
-            
-                if "type" in message_chunk and message_chunk["type"] == "AIMessageChunk":
-                    if message_chunk["response_metadata"]:
-                        finish_reason = message_chunk["response_metadata"].get("finish_reason", "")
-                        if finish_reason == "tool_calls":
-                            return "\n\n"
-                        
-                    if message_chunk["tool_call_chunks"]:
-                        tool_chunk = message_chunk["tool_call_chunks"][0]
-
-                        tool_name = tool_chunk.get("name", "")
-                        args = tool_chunk.get("args", "")
-                        
+                message_chunk, metadata = orjson.loads(data_content)
+
+                if message_chunk.get("type") == "AIMessageChunk":
+                    response_metadata = message_chunk.get("response_metadata")
+                    if response_metadata and response_metadata.get("finish_reason") == "tool_calls":
+                        return "\n\n"
+
+                    tool_call_chunks = message_chunk.get("tool_call_chunks")
+                    if tool_call_chunks:
+                        tool_chunk = tool_call_chunks[0]
+
+                        tool_name = tool_chunk.get("name")
                         if tool_name:
-                            tool_call_str = f"\n\n< TOOL CALL: {tool_name} >\n\n"
+                            return f"\n\n< TOOL CALL: {tool_name} >\n\n"
 
+                        args = tool_chunk.get("args")
                         if args:
-                            tool_call_str = args
-                        return tool_call_str
-                    else:
-                        return message_chunk["content"]
-                
+                            return args
+
+                        # Intermediate chunks can carry neither a name nor args
+                        return ""
+
+                    return message_chunk["content"]
+
                 # You can handle other event types here
-                
+
             elif current_event == "metadata":
                 return
 
@@ -120,13 +172,14 @@ def process_line(line: str, current_event: str) -> str:
         raise
 
 
-async def get_stream(thread_id: str, message: str):
+async def get_stream(thread_id: str, message: str, stream_done: asyncio.Event = None):
     """Send a message to the thread and process the streaming response.
 
     Args:
         thread_id: The thread ID to send the message to
         message: The message content
-        seen_tool_call_ids: A set of tool call IDs that have already been seen
+        stream_done: Optional event set as soon as the run's end event is
+            observed, so a waiter can overlap work with the stream teardown
 
     Returns:
         str: The complete response from the assistant
@@ -134,39 +187,95 @@ async def get_stream(thread_id: str, message: str):
     full_content = ""
     current_event = None
 
+    # Coalesce terminal writes: flushing stdout per token is one syscall
+    # per chunk, so buffer a few chunks (or ~50ms) between flushes
+    pending = []
+    last_flush = time.monotonic()
+
     try:
-        async with httpx.AsyncClient() as client:
-            async with client.stream(
-                "POST",
-                url=f"{LANGGRAPH_SERVER_URL}/threads/{thread_id}/runs/stream",
-                json={
-                    "assistant_id": "scout",
-                    "input": {
-                        "messages": [
-                            {"role": "human", "content": message}
-                        ]
-                    },
-                    "stream_mode": "messages-tuple"
+        client = await get_client()
+        async with client.stream(
+            "POST",
+            url=f"/threads/{thread_id}/runs/stream",
+            content=orjson.dumps({
+                "assistant_id": "scout",
+                "input": {
+                    "messages": [
+                        {"role": "human", "content": message}
+                    ]
                 },
-                timeout=60.0
-            ) as stream_response:
-                async for line in stream_response.aiter_lines():
-                    if line:
-                        # Process event lines
-                        if line.startswith("event: "):
-                            current_event = line[7:].strip()
-
-                        # Process data lines
-                        else:
-                            message_chunk = process_line(line, current_event)
-                            if message_chunk:
-                                full_content += message_chunk
-                                print(message_chunk, end="", flush=True)
+                "stream_mode": "messages-tuple"
+            }),
+            headers=JSON_HEADERS
+        ) as stream_response:
+            # Read raw bytes and split SSE lines ourselves so orjson parses
+            # bytes directly, skipping aiter_lines()'s per-line str decode.
+            buffer = bytearray()
+            # Scan anchor: a partial line can span many chunks, so resume
+            # the newline search where the last one left off instead of
+            # rescanning the buffered bytes on every chunk
+            scan_from = 0
+            async for chunk in stream_response.aiter_bytes(chunk_size=8192):
+                buffer.extend(chunk)
+
+                while (newline_index := buffer.find(b"\n", scan_from)) != -1:
+                    line = bytes(buffer[:newline_index]).rstrip(b"\r")
+                    del buffer[:newline_index + 1]
+                    scan_from = 0
+
+                    if not line:
+                        continue
+
+                    # Dispatch on the first byte before any prefix check:
+                    # data lines vastly outnumber event lines
+                    first_byte = line[0]
+
+                    # Process data lines
+                    if first_byte == 0x64:  # b"d"
+                        message_chunk = process_line(line, current_event)
+                        if message_chunk:
+                            full_content += message_chunk
+                            pending.append(message_chunk)
+
+                            now = time.monotonic()
+                            if len(pending) >= 8 or now - last_flush > 0.05:
+                                sys.stdout.write("".join(pending))
+                                sys.stdout.flush()
+                                pending.clear()
+                                last_flush = now
+
+                    # Process event lines (already CR-stripped, no .strip() needed)
+                    elif first_byte == 0x65 and line.startswith(b"event: "):  # b"e"
+                        current_event = line[7:].decode()
+
+                        # The run is committed once the end event arrives, so
+                        # release the waiter now rather than after the response
+                        # is drained and closed
+                        if current_event == "end" and stream_done is not None:
+                            stream_done.set()
+
+                # No newline yet: everything buffered so far has been scanned
+                scan_from = len(buffer)
 
         return full_content
     except Exception as e:
         print(f"Error in get_stream: {type(e).__name__}: {str(e)}")
         raise
+    finally:
+        # Write out anything still buffered
+        if pending:
+            sys.stdout.write("".join(pending))
+            sys.stdout.flush()
+        # Safety net: release the waiter even if the stream failed or never
+        # produced an end event, so it can't deadlock
+        if stream_done is not None:
+            stream_done.set()
+
+
+async def get_state_after_stream(thread_id: str, stream_done: asyncio.Event) -> dict:
+    """Fetch the thread state as soon as the stream has finished."""
+    await stream_done.wait()
+    return await get_thread_state(thread_id)
 
 
 async def main():
@@ -184,7 +293,7 @@ async def main():
                 break
             elif user_input.lower() in ["history", "h"]:
                 # Show thread history
-                print(f"\n---- Thread History ---- \n")
+                print("\n---- Thread History ---- \n")
                 try:
                     messages = await get_thread_messages(thread_id)
                     if "messages" in messages:
@@ -200,7 +309,7 @@ async def main():
                 continue
             elif user_input.lower() in ["save", "s"]:
                 # Save current thread state
-                print(f"\n---- Saving Thread State ---- \n")
+                print("\n---- Saving Thread State ---- \n")
                 try:
                     thread_state = await get_thread_state(thread_id)
                     save_result = await save_thread_state(thread_id, thread_state)
@@ -212,18 +321,21 @@ async def main():
 
             print(f"\n---- User ---- \n\n{user_input}\n")
 
-            print(f"---- Assistant ---- \n")
-            # Get the response using our simplified get_stream function
-            result = await get_stream(thread_id, user_input)
-
-            # check state after run
-            thread_state = await get_thread_state(thread_id)
+            print("---- Assistant ---- \n")
+            # Stream the response and fetch the post-run state concurrently:
+            # get_stream signals the event on the run's end marker, so the
+            # state call overlaps the stream teardown instead of costing an
+            # extra round trip afterwards
+            stream_done = asyncio.Event()
+            result, thread_state = await asyncio.gather(
+                get_stream(thread_id, user_input, stream_done),
+                get_state_after_stream(thread_id, stream_done)
+            )
 
             if "chart_json" in thread_state["values"]:
                 chart_json = thread_state["values"]["chart_json"]
                 # render any new charts generated
                 if chart_json and chart_json != current_chart:
-                    import plotly.io as pio
                     fig = pio.from_json(chart_json)
                     fig.show()
 
@@ -233,10 +345,11 @@ async def main():
     except Exception as e:
         print(f"Error: {type(e).__name__}: {str(e)}")
         raise
+    finally:
+        await close_client()
 
 
 if __name__ == "__main__":
-    import asyncio
     import nest_asyncio
     nest_asyncio.apply()
 
@@ -18,6 +18,8 @@ required_env_vars = [
     "GROQ_API_KEY",
 ]
 
-for var in required_env_vars:
-    if not var:
-        raise ValueError(f"Missing required environment variable: {var}")
\ No newline at end of file
+# Check the values, not the names — `if not var` on the name string was
+# always falsy, so missing vars slipped through to fail much later
+_missing = [var for var in required_env_vars if not globals()[var]]
+if _missing:
+    raise ValueError(f"Missing required environment variables: {', '.join(_missing)}")
\ No newline at end of file
@@ -1,3 +1,4 @@
+import atexit
 from pydantic import BaseModel
 from typing import Annotated, List, Generator
 from langchain_groq import ChatGroq
@@ -14,6 +15,40 @@ from scout.env import GROQ_API_KEY, GROQ_MODEL, GROQ_TEMPERATURE, DATABASE_URI
 # Global flag to track if Groq config has been logged
 _groq_config_logged = False
 
+# Process-wide checkpointer instance
+_checkpointer = None
+
+
+def get_checkpointer():
+    """Get the process-wide checkpointer, creating it on first use.
+
+    PostgresSaver.from_conn_string returns a context manager; it is entered
+    once here and kept open for the process lifetime (closed via atexit), so
+    every checkpoint read/write reuses the established connection instead of
+    reconnecting per operation.
+    """
+    global _checkpointer
+    if _checkpointer is not None:
+        return _checkpointer
+
+    if DATABASE_URI:
+        try:
+            pg_cm = PostgresSaver.from_conn_string(DATABASE_URI)
+            checkpointer = pg_cm.__enter__()
+            checkpointer.setup()  # Create tables if they don't exist
+            atexit.register(pg_cm.__exit__, None, None, None)
+            print("✅ Using PostgreSQL checkpointer for persistence")
+        except Exception as e:
+            print(f"⚠️  PostgreSQL checkpointer failed: {e}")
+            print("   Falling back to MemorySaver (no persistence)")
+            checkpointer = MemorySaver()
+    else:
+        print("⚠️  DATABASE_URI not set, using MemorySaver (no persistence)")
+        checkpointer = MemorySaver()
+
+    _checkpointer = checkpointer
+    return _checkpointer
+
 
 def get_groq_chat_model() -> ChatGroq:
     """Get the main Groq chat model for complex tasks."""
@@ -40,8 +75,9 @@ def get_groq_chat_model() -> ChatGroq:
         model=model,         # note: use `model=...` per most Groq bindings
         temperature=temperature,
         api_key=api_key,
-        # Explicitly disable any configurable features that might cause issues
-        streaming=False,  # Disable streaming at model level to avoid context issues
+        # Stream at the model level so stream_mode="messages" yields real
+        # incremental tokens instead of one full-response chunk
+        streaming=True,
         timeout=30.0,     # Set explicit timeout
     )
 
@@ -75,23 +111,42 @@ class Agent:
         self.model = model or GROQ_MODEL
         self.system_prompt = system_prompt
         self.temperature = temperature if temperature is not None else GROQ_TEMPERATURE
-        
-        self.llm = get_groq_chat_model().bind_tools(self.tools)
-        
+
+        # Build the system message once; scout_node reuses it on every hop
+        self._sys_msg = SystemMessage(content=self.system_prompt)
+
+        self._llm = None
+        self._runnable = None
         self.runnable = self.build_graph()
 
 
+    def get_llm(self):
+        """Get the tool-bound Groq chat model, constructing it on first use.
+
+        This is a method rather than a property: graph compilation resolves
+        attribute references inside node closures, so a lazy property would
+        still be built at compile time.
+        """
+        if self._llm is None:
+            self._llm = get_groq_chat_model().bind_tools(self.tools)
+        return self._llm
+
+
     def build_graph(self):
         """
         Build the LangGraph application.
+
+        The compiled graph is cached on the instance, so repeated calls
+        (e.g. inspect_graph) don't re-run checkpointer setup.
         """
-        def scout_node(state: ScoutState) -> ScoutState:
-            response = self.llm.invoke(
-                [SystemMessage(content=self.system_prompt)] +
-                state.messages
-                )
-            state.messages = state.messages + [response]
-            return state
+        if self._runnable is not None:
+            return self._runnable
+
+        def scout_node(state: ScoutState) -> dict:
+            response = self.get_llm().invoke([self._sys_msg, *state.messages])
+            # Partial update: the add_messages reducer appends the response
+            # without copying the existing history
+            return {"messages": [response]}
         
         def router(state: ScoutState) -> str:
             last_message = state.messages[-1]
@@ -110,21 +165,8 @@ class Agent:
         builder.add_edge("tools", "chatbot")
 
         # Use PostgreSQL checkpointer for persistence
-        checkpointer = None
-        if DATABASE_URI:
-            try:
-                checkpointer = PostgresSaver.from_conn_string(DATABASE_URI)
-                checkpointer.setup()  # Create tables if they don't exist
-                print("✅ Using PostgreSQL checkpointer for persistence")
-            except Exception as e:
-                print(f"⚠️  PostgreSQL checkpointer failed: {e}")
-                print("   Falling back to MemorySaver (no persistence)")
-                checkpointer = MemorySaver()
-        else:
-            print("⚠️  DATABASE_URI not set, using MemorySaver (no persistence)")
-            checkpointer = MemorySaver()
-        
-        return builder.compile(checkpointer=checkpointer)
+        self._runnable = builder.compile(checkpointer=get_checkpointer())
+        return self._runnable
     
 
     def inspect_graph(self):
@@ -173,27 +215,24 @@ class Agent:
             **kwargs
         ):
             if isinstance(message_chunk, AIMessageChunk):
-                if message_chunk.response_metadata:
-                    finish_reason = message_chunk.response_metadata.get("finish_reason", "")
-                    if finish_reason == "tool_calls":
-                        yield "\n\n"
+                response_metadata = message_chunk.response_metadata
+                if response_metadata and response_metadata.get("finish_reason") == "tool_calls":
+                    yield "\n\n"
 
-                if message_chunk.tool_call_chunks:
-                    tool_chunk = message_chunk.tool_call_chunks[0]
+                tool_call_chunks = message_chunk.tool_call_chunks
+                if tool_call_chunks:
+                    tool_chunk = tool_call_chunks[0]
 
-                    tool_name = tool_chunk.get("name", "")
-                    args = tool_chunk.get("args", "")
-
-                    
+                    tool_name = tool_chunk.get("name")
                     if tool_name:
-                        tool_call_str = f"\n\n< TOOL CALL: {tool_name} >\n\n"
-
-                    if args:
-                        tool_call_str = args
-                    yield tool_call_str
+                        yield f"\n\n< TOOL CALL: {tool_name} >\n\n"
+                    else:
+                        # Chunks with neither a name nor args yield nothing
+                        args = tool_chunk.get("args")
+                        if args:
+                            yield args
                 else:
                     yield message_chunk.content
-                continue
 
 
 # Define and instantiate the agent 
@@ -201,4 +240,4 @@ agent = Agent(
         name="Scout",
         system_prompt=prompts.scout_system_prompt
         )
-graph = agent.build_graph()
+graph = agent.runnable